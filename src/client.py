@@ -1,85 +1,51 @@
 import os
 import argparse
-import json
+import asyncio
+import hashlib
+import io
 import sys
+import tempfile
+import time
+from typing import Optional
+import httpx
+import orjson
 from google import genai
-from google.genai import types
-from src.tools.parsers import parse_junit_xml, parse_cobertura_xml, read_security_config
+from google.genai import errors, types
+try:
+    # mypyc build of parsers.py (see Dockerfile); absent in a plain checkout
+    from src.tools.parsers_native import parse_junit_xml, parse_cobertura_xml, read_security_config
+except ImportError:
+    from src.tools.parsers import parse_junit_xml, parse_cobertura_xml, read_security_config
+from src.tools.models import TestSummary, CoverageSummary, SecurityConfig
 
 # --- Configuration ---
 MIN_COVERAGE_THRESHOLD = 0.75
 MAX_FACE_THRESHOLD = 0.55
 MODEL_NAME = "gemini-3-flash-preview"
+CACHE_TTL_SECONDS = 3600
+CACHE_EXPIRY_MARGIN_SECONDS = 60  # Recreate slightly early so a run never races the expiry
+MIN_CACHE_TOKENS = 1024  # Smallest prompt Gemini accepts for explicit context caching
+RESPONSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ai-release-manager")
+CACHE_ID_PATH = os.path.join(RESPONSE_CACHE_DIR, "gemini_cache_id.json")
+RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+MAX_PROMPT_FAILED_TESTS = 20  # Keeps prompt size bounded on flood-failure runs
 
-def main():
-    parser = argparse.ArgumentParser(description="AI Release Manager Agent")
-    parser.add_argument("--artifacts", required=True, help="Path to artifacts directory")
-    parser.add_argument("--repo-root", required=True, help="Path to repo root")
-    args = parser.parse_args()
-
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        print("[ERROR] GEMINI_API_KEY not set.")
-        sys.exit(1)
-
-    # Initialize New Client
-    client = genai.Client(api_key=api_key)
-
-    print(f"[INFO] Starting AI Release Manager (Model: {MODEL_NAME})...")
-    
-    # Paths
-    test_xml = os.path.join(args.artifacts, "test-results.xml")
-    cov_xml = os.path.join(args.artifacts, "coverage.xml")
-    config_path = os.path.join(args.repo_root, "Face_detection_back/app/config.py")
-
-    # 1. Gather Intelligence
-    print(f"[INFO] Reading Test Results from: {test_xml}")
-    try:
-        test_data = parse_junit_xml(test_xml)
-        print(f"[INFO] Tests: {test_data.total} total, {test_data.failures} failed")
-    except Exception as e:
-        print(f"[WARN] Failed to parse tests: {e}")
-        test_data = None
-
-    print(f"[INFO] Reading Coverage from: {cov_xml}")
-    try:
-        cov_data = parse_cobertura_xml(cov_xml)
-        print(f"[INFO] Coverage: {cov_data.line_rate:.2%}")
-    except Exception as e:
-        print(f"[WARN] Failed to parse coverage: {e}")
-        cov_data = None
-
-    print(f"[INFO] Reading Security Config from: {config_path}")
-    sec_config = read_security_config(config_path)
-    print(f"[INFO] Security Threshold: {sec_config.face_threshold}")
-
-    # 2. Construct Enhanced Prompt
-    prompt = f"""
+# Static part of the prompt. It only depends on the constants above, so once it is
+# large enough (SCAFFOLD_CACHEABLE) it is uploaded as a Gemini CachedContent and
+# reused across runs within the TTL.
+# It is also always sent ahead of the per-run data, so that when explicit caching
+# is unavailable the provider's automatic prefix cache still sees an identical prefix.
+# Keep every per-run value out of it.
+SYSTEM_SCAFFOLD = f"""
     You are a Senior Release Manager and Site Reliability Engineer reviewing a production deployment for a critical Face Verification System.
     
     ## MISSION
     Analyze the CI/CD pipeline data and produce a comprehensive release decision report.
+    The pipeline data for this run is provided in the PIPELINE DATA section of the user message.
     
-    ## PIPELINE DATA
-    
-    ### Test Results
-    - Status: {"PASSED" if test_data and test_data.failures == 0 else "FAILED"}
-    - Total Tests: {test_data.total if test_data else 0}
-    - Failures: {test_data.failures if test_data else 0}
-    - Errors: {test_data.errors if test_data else 0}
-    - Skipped: {test_data.skipped if test_data else 0}
-    - Execution Time: {test_data.time if test_data else 0}s
-    - Failed Test Names: {test_data.failed_test_names if test_data else []}
-    
-    ### Code Coverage
-    - Current Coverage: {cov_data.line_rate if cov_data else 0.0:.2%}
-    - Required Minimum: {MIN_COVERAGE_THRESHOLD:.0%}
-    - Gap: {(MIN_COVERAGE_THRESHOLD - (cov_data.line_rate if cov_data else 0.0)):.2%}
-    
-    ### Security Configuration
-    - Face Detection Threshold: {sec_config.face_threshold}
-    - Maximum Safe Threshold: {MAX_FACE_THRESHOLD}
-    - Liveness Min Frames: {sec_config.liveness_min_frames}
+    ## REFERENCE THRESHOLDS
+    - Required Minimum Coverage: {MIN_COVERAGE_THRESHOLD:.0%}
+    - Maximum Safe Face Detection Threshold: {MAX_FACE_THRESHOLD}
     
     ## DECISION CRITERIA
     
@@ -145,37 +111,296 @@ def main():
     Be thorough, professional, and actionable. Do not use emojis.
     """
 
-    # 3. Call LLM
-    print("[INFO] Analyzing with Gemini...")
+# Hash state after consuming model + scaffold; per-run keys copy it and only hash the payload
+_SCAFFOLD_HASHER = hashlib.sha256(f"{MODEL_NAME}\0{SYSTEM_SCAFFOLD}".encode("utf-8"))
+SCAFFOLD_HASH = _SCAFFOLD_HASHER.hexdigest()
+# Rough 4-chars-per-token estimate. Below the minimum, caches.create can only be
+# rejected, so the scaffold is sent inline and left to the provider's prefix cache.
+SCAFFOLD_CACHEABLE = len(SYSTEM_SCAFFOLD) // 4 >= MIN_CACHE_TOKENS
+
+def _write_cache_entry(entry: dict) -> None:
+    try:
+        os.makedirs(RESPONSE_CACHE_DIR, exist_ok=True)
+        with open(CACHE_ID_PATH, "wb") as f:
+            f.write(orjson.dumps(entry))
+    except OSError as e:
+        print(f"[WARN] Could not persist cache id: {e}")
+
+async def get_scaffold_cache(client: genai.Client, refresh: bool = False) -> Optional[str]:
+    """
+    Returns the name of a CachedContent holding SYSTEM_SCAFFOLD, creating it if needed.
+    The name and its expiry are persisted in CACHE_ID_PATH, keyed by SCAFFOLD_HASH,
+    so a changed scaffold never reuses a stale cache. Returns None if caching is unavailable;
+    a scaffold rejected as too small is remembered so later runs do not retry the create call.
+    """
+    if not SCAFFOLD_CACHEABLE:
+        return None
+
+    if not refresh and os.path.exists(CACHE_ID_PATH):
+        try:
+            with open(CACHE_ID_PATH, "rb") as f:
+                entry = orjson.loads(f.read())
+            if isinstance(entry, dict) and entry.get("scaffold_sha256") == SCAFFOLD_HASH:
+                if entry.get("unavailable"):
+                    return None
+                if entry.get("name") and entry.get("expire_time", 0) - CACHE_EXPIRY_MARGIN_SECONDS > time.time():
+                    return entry["name"]
+        except (OSError, ValueError, TypeError):
+            pass
+
     try:
-        response = client.models.generate_content(
+        cached_content = await client.aio.caches.create(
             model=MODEL_NAME,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json"   
+            config=types.CreateCachedContentConfig(
+                contents=[SYSTEM_SCAFFOLD],
+                ttl=f"{CACHE_TTL_SECONDS}s"
             )
         )
+    except errors.ClientError as e:
+        print(f"[WARN] Context caching unavailable, sending full prompt: {e}")
+        # Only the minimum-size rejection is a property of the scaffold itself;
+        # other 400s (e.g. an invalid API key) must not disable caching
+        if e.code == 400 and "min_total_token_count" in str(e.message):
+            _write_cache_entry({"scaffold_sha256": SCAFFOLD_HASH, "unavailable": True})
+        return None
+    except Exception as e:
+        print(f"[WARN] Context caching unavailable, sending full prompt: {e}")
+        return None
+
+    if cached_content.expire_time:
+        expire_time = cached_content.expire_time.timestamp()
+    else:
+        expire_time = time.time() + CACHE_TTL_SECONDS
+    _write_cache_entry({
+        "scaffold_sha256": SCAFFOLD_HASH,
+        "name": cached_content.name,
+        "expire_time": expire_time
+    })
+    return cached_content.name
+
+async def generate_release_decision(client: genai.Client, user_payload: str, cached_name: Optional[str]) -> str:
+    """
+    Streams the Gemini response and returns the full text.
+    Sends only the pipeline data when the scaffold is cached,
+    falling back to the full scaffold + data prompt otherwise.
+    """
+    if cached_name:
+        contents = user_payload
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json",
+            cached_content=cached_name
+        )
+    else:
+        contents = [SYSTEM_SCAFFOLD, user_payload]
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json"
+        )
+
+    buf = io.StringIO()
+    stream = await client.aio.models.generate_content_stream(model=MODEL_NAME, contents=contents, config=config)
+    async for chunk in stream:
+        if chunk.text:
+            buf.write(chunk.text)
+    return buf.getvalue()
+
+def write_artifact(path: str, text: str) -> None:
+    """
+    Writes an output file atomically so CI never picks up a half-written artifact.
+    """
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".", suffix=".tmp", delete=False) as f:
+        f.write(text)
+    os.chmod(f.name, 0o644)  # NamedTemporaryFile creates files as 0600
+    os.replace(f.name, path)
+
+# Stand-in rendered when the JUnit report is missing or unreadable
+_NO_TEST_RESULTS = TestSummary(total=0, failures=0, errors=0, skipped=0, time=0.0, failed_test_names=[])
+
+def build_user_payload(
+    test_data: Optional[TestSummary],
+    cov_data: Optional[CoverageSummary],
+    sec_config: SecurityConfig
+) -> str:
+    """
+    Renders the per-run PIPELINE DATA block. Static text belongs in SYSTEM_SCAFFOLD,
+    which is built once at import, so only these few lines are formatted per run.
+    """
+    tests = (test_data or _NO_TEST_RESULTS).as_prompt_view(MAX_PROMPT_FAILED_TESTS)
+    failed_tests = tests["failed_sample"]
+    if tests["failed_omitted"]:
+        failed_tests = failed_tests + [f"...and {tests['failed_omitted']} more"]
+
+    return f"""
+    ## PIPELINE DATA
+    
+    ### Test Results
+    - Status: {"PASSED" if test_data and tests["failures"] == 0 else "FAILED"}
+    - Total Tests: {tests["total"]}
+    - Failures: {tests["failures"]}
+    - Errors: {tests["errors"]}
+    - Skipped: {tests["skipped"]}
+    - Execution Time: {tests["time"]}s
+    - Failed Test Names: {failed_tests}
+    
+    ### Code Coverage
+    - Current Coverage: {cov_data.line_rate if cov_data else 0.0:.2%}
+    - Gap: {(MIN_COVERAGE_THRESHOLD - (cov_data.line_rate if cov_data else 0.0)):.2%}
+    
+    ### Security Configuration
+    - Face Detection Threshold: {sec_config.face_threshold}
+    - Liveness Min Frames: {sec_config.liveness_min_frames}
+    """
+
+def response_cache_key(user_payload: str) -> str:
+    """
+    Hashes everything that determines the model output: model, scaffold and pipeline data.
+    """
+    hasher = _SCAFFOLD_HASHER.copy()
+    hasher.update(user_payload.encode("utf-8"))
+    return hasher.hexdigest()
+
+def load_cached_response(key: str) -> Optional[dict]:
+    """
+    Returns a previously stored decision for this prompt, or None if missing, older than
+    the TTL, or not a JSON object.
+    """
+    cache_path = os.path.join(RESPONSE_CACHE_DIR, f"{key}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_path) > RESPONSE_CACHE_TTL_SECONDS:
+            return None
+        with open(cache_path, "rb") as f:
+            cached = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    return cached if isinstance(cached, dict) else None
+
+def store_cached_response(key: str, result: dict) -> None:
+    """
+    Atomically writes the decision to the response cache (tempfile + os.replace).
+    Anything other than a JSON object is not a usable decision and is not stored.
+    """
+    if not isinstance(result, dict):
+        return
+    try:
+        os.makedirs(RESPONSE_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=RESPONSE_CACHE_DIR, suffix=".tmp", delete=False) as f:
+            f.write(orjson.dumps(result))
+        os.replace(f.name, os.path.join(RESPONSE_CACHE_DIR, f"{key}.json"))
+    except OSError as e:
+        print(f"[WARN] Could not write response cache: {e}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="AI Release Manager Agent")
+    parser.add_argument("--artifacts", required=True, help="Path to artifacts directory")
+    parser.add_argument("--repo-root", required=True, help="Path to repo root")
+    parser.add_argument("--no-cache", action="store_true", help="Always query Gemini, ignoring cached decisions")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print("[ERROR] GEMINI_API_KEY not set.")
+        sys.exit(1)
+
+    # Initialize New Client. All calls go through client.aio on one HTTP/2
+    # connection pool, so the cache, generate and list-models requests share
+    # connections instead of each paying a TLS handshake. The pool is closed on
+    # every exit path, including the sys.exit calls inside run_release_manager.
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=4)
+    ) as http:
+        client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(httpx_async_client=http)
+        )
+        await run_release_manager(args, client)
+
+async def run_release_manager(args: argparse.Namespace, client: genai.Client) -> None:
+    """
+    Reads the artifacts, obtains a decision and exits with the pipeline status.
+    """
+    print(f"[INFO] Starting AI Release Manager (Model: {MODEL_NAME})...")
+    
+    # Paths
+    test_xml = os.path.join(args.artifacts, "test-results.xml")
+    cov_xml = os.path.join(args.artifacts, "coverage.xml")
+    config_path = os.path.join(args.repo_root, "Face_detection_back/app/config.py")
+
+    # 1. Gather Intelligence (the three sources are independent, so read them concurrently)
+    print(f"[INFO] Reading Test Results from: {test_xml}")
+    print(f"[INFO] Reading Coverage from: {cov_xml}")
+    print(f"[INFO] Reading Security Config from: {config_path}")
+    test_data, cov_data, sec_config = await asyncio.gather(
+        asyncio.to_thread(parse_junit_xml, test_xml),
+        asyncio.to_thread(parse_cobertura_xml, cov_xml),
+        asyncio.to_thread(read_security_config, config_path),
+        return_exceptions=True
+    )
+
+    # return_exceptions also hands back CancelledError, KeyboardInterrupt and other
+    # BaseExceptions; only ordinary errors are downgraded to warnings below
+    for outcome in (test_data, cov_data, sec_config):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            raise outcome
+
+    if isinstance(test_data, Exception):
+        print(f"[WARN] Failed to parse tests: {test_data}")
+        test_data = None
+    else:
+        print(f"[INFO] Tests: {test_data.total} total, {test_data.failures} failed")
+
+    if isinstance(cov_data, Exception):
+        print(f"[WARN] Failed to parse coverage: {cov_data}")
+        cov_data = None
+    else:
+        print(f"[INFO] Coverage: {cov_data.line_rate:.2%}")
+
+    if isinstance(sec_config, BaseException):
+        raise sec_config
+    print(f"[INFO] Security Threshold: {sec_config.face_threshold}")
+
+    # 2. Construct Pipeline Payload
+    user_payload = build_user_payload(test_data, cov_data, sec_config)
+
+    # 3. Call LLM (or reuse the decision for an identical prompt)
+    cache_key = response_cache_key(user_payload)
+    result = None if args.no_cache else load_cached_response(cache_key)
+    if result is not None:
+        print(f"[INFO] Reusing cached analysis ({cache_key[:12]})")
+    else:
+        print("[INFO] Analyzing with Gemini...")
+        try:
+            cached_name = await get_scaffold_cache(client)
+            try:
+                raw_response = await generate_release_decision(client, user_payload, cached_name)
+            except errors.ClientError as e:
+                if not cached_name or e.code not in (403, 404):
+                    raise
+                # Cache expired or was deleted server-side: recreate once and retry
+                print(f"[WARN] Cached scaffold rejected ({e.code}), recreating...")
+                cached_name = await get_scaffold_cache(client, refresh=True)
+                raw_response = await generate_release_decision(client, user_payload, cached_name)
         
-        raw_response = response.text
-        # Clean markdown code blocks if present
-        if "```json" in raw_response:
-            raw_response = raw_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in raw_response:
-            raw_response = raw_response.split("```")[1].split("```")[0].strip()
+            # Clean markdown code blocks if present
+            if "```json" in raw_response:
+                raw_response = raw_response.split("```json")[1].split("```")[0].strip()
+            elif "```" in raw_response:
+                raw_response = raw_response.split("```")[1].split("```")[0].strip()
             
-        result = json.loads(raw_response)
-        if isinstance(result, list):
-            result = result[0]
+            result = orjson.loads(raw_response)
+            if isinstance(result, list):
+                result = result[0]
         
-    except Exception as e:
-        print(f"[FATAL] AI Analysis failed: {e}")
-        print("[DEBUG] Listing available models:")
-        try:
-            for model in client.models.list():
-                print(f"  - {model.name}")
-        except Exception as list_err:
-            print(f"  [ERROR] Could not list models: {list_err}")
-        sys.exit(1)
+        except Exception as e:
+            print(f"[FATAL] AI Analysis failed: {e}")
+            print("[DEBUG] Listing available models:")
+            try:
+                async for model in await client.aio.models.list():
+                    print(f"  - {model.name}")
+            except Exception as list_err:
+                print(f"  [ERROR] Could not list models: {list_err}")
+            sys.exit(1)
+
+        store_cached_response(cache_key, result)
 
     # 4. Report
     print("-" * 40)
@@ -183,11 +408,14 @@ def main():
     print("-" * 40)
 
     # Save artifacts
-    with open(os.path.join(args.artifacts, "release_summary.md"), "w") as f:
-        f.write(result.get("analysis_summary", "No summary provided."))
-    
-    with open(os.path.join(args.artifacts, "release_decision.json"), "w") as f:
-        json.dump(result, f, indent=2)
+    write_artifact(
+        os.path.join(args.artifacts, "release_summary.md"),
+        result.get("analysis_summary", "No summary provided.")
+    )
+    write_artifact(
+        os.path.join(args.artifacts, "release_decision.json"),
+        orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
+    )
 
     if result.get("verdict") == "APPROVED":
         sys.exit(0)
@@ -195,4 +423,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
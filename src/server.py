@@ -2,11 +2,17 @@ import asyncio
 import os
 import sys
 from pathlib import Path
-from typing import Any, Sequence
+from typing import Any, Callable, Dict, Sequence, Tuple, Type
+import orjson
+from pydantic import BaseModel, Field
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from src.tools.parsers import parse_junit_xml, parse_cobertura_xml, read_security_config, analyze_logs
+try:
+    # mypyc build of parsers.py (see Dockerfile); absent in a plain checkout
+    from src.tools.parsers_native import parse_junit_xml, parse_cobertura_xml, read_security_config, analyze_logs
+except ImportError:
+    from src.tools.parsers import parse_junit_xml, parse_cobertura_xml, read_security_config, analyze_logs
 
 # Configuration - Allowed base directories for security
 ALLOWED_BASE_PATHS = [
@@ -14,6 +20,9 @@ ALLOWED_BASE_PATHS = [
     os.path.join(os.getcwd(), "artifacts"),
     os.path.expanduser("~"),  # Allow home directory
 ]
+# Resolved once at import. The trailing separator stops /home/foo from matching /home/foobar.
+_RESOLVED_BASES = tuple(os.path.join(str(Path(base).resolve()), "") for base in ALLOWED_BASE_PATHS)
+MAX_LOG_SIZE = 1_000_000  # 1MB limit for scan_build_logs
 
 # Initialize Server
 app = Server("ai-release-manager-tools")
@@ -24,83 +33,93 @@ def is_path_safe(file_path: str) -> bool:
     Prevents path traversal attacks.
     """
     try:
-        abs_path = Path(file_path).resolve()
-        return any(
-            str(abs_path).startswith(str(Path(base).resolve()))
-            for base in ALLOWED_BASE_PATHS
-        )
+        abs_path = os.path.join(str(Path(file_path).resolve()), "")
+        return any(abs_path.startswith(base) for base in _RESOLVED_BASES)
     except (ValueError, OSError):
         return False
 
+def _to_json(data: BaseModel) -> str:
+    """
+    Serializes a parser result for a TextContent response.
+    The result models are flat, so their field dict can go straight to orjson.
+    """
+    return orjson.dumps(vars(data), option=orjson.OPT_INDENT_2).decode()
+
+# --- Tool Arguments ---
+# These models are the single source of truth: call_tool validates with them
+# and list_tools publishes their JSON schemas as each tool's inputSchema.
+
+class JunitArgs(BaseModel):
+    xml_path: str = Field(
+        min_length=1,
+        description="Absolute path to the JUnit XML test results file (e.g., test-results.xml)"
+    )
+
+class CoberturaArgs(BaseModel):
+    xml_path: str = Field(
+        min_length=1,
+        description="Absolute path to the Cobertura XML coverage file (e.g., coverage.xml)"
+    )
+
+class ConfigPathArgs(BaseModel):
+    config_path: str = Field(
+        min_length=1,
+        description="Absolute path to the Python config file (e.g., app/config.py)"
+    )
+
+class LogArgs(BaseModel):
+    log_text: str = Field(
+        min_length=1,
+        max_length=MAX_LOG_SIZE,
+        description="The raw text content of the build log to analyze"
+    )
+    max_lines: int = Field(
+        default=50,
+        ge=0,
+        description=(
+            "Maximum number of error/warning lines to return (default: 50). Scanning stops once both "
+            "lists are full and truncated is set; error_count and warning_count are then estimates "
+            "for the unscanned rest of the log. 0 returns exact counts only, without lines."
+        )
+    )
+
+def _safe_path(file_path: str) -> str:
+    if not is_path_safe(file_path):
+        raise PermissionError(f"Access denied: {file_path} is outside allowed directories")
+    return file_path
+
+# Tool name -> (argument schema, handler). Validation errors surface as ValueError.
+_HANDLERS: Dict[str, Tuple[Type[BaseModel], Callable[[Any], BaseModel]]] = {
+    "get_test_results": (JunitArgs, lambda a: parse_junit_xml(_safe_path(a.xml_path))),
+    "get_coverage_report": (CoberturaArgs, lambda a: parse_cobertura_xml(_safe_path(a.xml_path))),
+    "check_security_constants": (ConfigPathArgs, lambda a: read_security_config(_safe_path(a.config_path))),
+    "scan_build_logs": (LogArgs, lambda a: analyze_logs(a.log_text, max_lines=a.max_lines)),
+}
+
+_DESCRIPTIONS = {
+    "get_test_results": "Parses a JUnit XML file and returns test execution metrics including pass/fail counts, execution time, and failed test names.",
+    "get_coverage_report": "Parses a Cobertura XML file and returns code coverage statistics including line rate and coverage percentages.",
+    "check_security_constants": "Reads a Python configuration file and extracts security-related constants like face detection thresholds and liveness parameters.",
+    "scan_build_logs": "Analyzes build log text for errors, exceptions, and warnings, returning counts and extracted error messages.",
+}
+
+# Schemas are generated once at import rather than on every discovery call
+_TOOLS = [
+    Tool(
+        name=name,
+        description=_DESCRIPTIONS[name],
+        inputSchema=schema.model_json_schema()
+    )
+    for name, (schema, _) in _HANDLERS.items()
+]
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """
     Register all available tools with proper schemas.
     This is called by MCP clients to discover capabilities.
     """
-    return [
-        Tool(
-            name="get_test_results",
-            description="Parses a JUnit XML file and returns test execution metrics including pass/fail counts, execution time, and failed test names.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "xml_path": {
-                        "type": "string",
-                        "description": "Absolute path to the JUnit XML test results file (e.g., test-results.xml)"
-                    }
-                },
-                "required": ["xml_path"]
-            }
-        ),
-        Tool(
-            name="get_coverage_report",
-            description="Parses a Cobertura XML file and returns code coverage statistics including line rate and coverage percentages.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "xml_path": {
-                        "type": "string",
-                        "description": "Absolute path to the Cobertura XML coverage file (e.g., coverage.xml)"
-                    }
-                },
-                "required": ["xml_path"]
-            }
-        ),
-        Tool(
-            name="check_security_constants",
-            description="Reads a Python configuration file and extracts security-related constants like face detection thresholds and liveness parameters.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "config_path": {
-                        "type": "string",
-                        "description": "Absolute path to the Python config file (e.g., app/config.py)"
-                    }
-                },
-                "required": ["config_path"]
-            }
-        ),
-        Tool(
-            name="scan_build_logs",
-            description="Analyzes build log text for errors, exceptions, and warnings, returning counts and extracted error messages.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "log_text": {
-                        "type": "string",
-                        "description": "The raw text content of the build log to analyze"
-                    },
-                    "max_lines": {
-                        "type": "integer",
-                        "description": "Maximum number of error/warning lines to return (default: 50)",
-                        "default": 50
-                    }
-                },
-                "required": ["log_text"]
-            }
-        )
-    ]
+    return _TOOLS
 
 @app.call_tool()
 async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
@@ -110,65 +129,15 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
     Returns structured TextContent responses.
     """
     try:
-        if name == "get_test_results":
-            xml_path = arguments.get("xml_path")
-            if not xml_path:
-                raise ValueError("xml_path is required")
-            
-            if not is_path_safe(xml_path):
-                raise PermissionError(f"Access denied: {xml_path} is outside allowed directories")
-            
-            data = parse_junit_xml(xml_path)
-            return [TextContent(
-                type="text",
-                text=data.model_dump_json(indent=2)
-            )]
-        
-        elif name == "get_coverage_report":
-            xml_path = arguments.get("xml_path")
-            if not xml_path:
-                raise ValueError("xml_path is required")
-            
-            if not is_path_safe(xml_path):
-                raise PermissionError(f"Access denied: {xml_path} is outside allowed directories")
-            
-            data = parse_cobertura_xml(xml_path)
-            return [TextContent(
-                type="text",
-                text=data.model_dump_json(indent=2)
-            )]
-        
-        elif name == "check_security_constants":
-            config_path = arguments.get("config_path")
-            if not config_path:
-                raise ValueError("config_path is required")
-            
-            if not is_path_safe(config_path):
-                raise PermissionError(f"Access denied: {config_path} is outside allowed directories")
-            
-            data = read_security_config(config_path)
-            return [TextContent(
-                type="text",
-                text=data.model_dump_json(indent=2)
-            )]
-        
-        elif name == "scan_build_logs":
-            log_text = arguments.get("log_text")
-            if not log_text:
-                raise ValueError("log_text is required")
-            
-            if len(log_text) > 1_000_000:  # 1MB limit
-                raise ValueError(f"Log text exceeds maximum size of 1MB")
-            
-            max_lines = arguments.get("max_lines", 50)
-            data = analyze_logs(log_text, max_lines=max_lines)
-            return [TextContent(
-                type="text",
-                text=data.model_dump_json(indent=2)
-            )]
-        
-        else:
+        if name not in _HANDLERS:
             raise ValueError(f"Unknown tool: {name}")
+
+        schema, handler = _HANDLERS[name]
+        data = handler(schema.model_validate(arguments or {}))
+        return [TextContent(
+            type="text",
+            text=_to_json(data)
+        )]
     
     except FileNotFoundError as e:
         return [TextContent(
@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+# --- Data Models ---
+
+class TestSummary(BaseModel):
+    total: int
+    failures: int
+    errors: int
+    skipped: int
+    time: float
+    failed_test_names: List[str]
+
+    def as_prompt_view(self, cap: int) -> Dict[str, Any]:
+        """
+        Compact projection for LLM prompts: O(cap) in size however many tests failed.
+        """
+        failed_sample = self.failed_test_names[:cap]
+        return {
+            "total": self.total,
+            "failures": self.failures,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "time": round(self.time, 2),
+            "failed_sample": failed_sample,
+            "failed_omitted": len(self.failed_test_names) - len(failed_sample),
+        }
+
+class CoverageSummary(BaseModel):
+    line_rate: float
+    total_lines: int
+    covered_lines: int
+
+class SecurityConfig(BaseModel):
+    face_threshold: Optional[float]
+    liveness_min_frames: Optional[int]
+
+class LogAnalysis(BaseModel):
+    error_count: int
+    warning_count: int
+    critical_errors: List[str]
+    warnings: List[str]
+    truncated: bool = False
@@ -1,45 +1,117 @@
+import functools
+import mmap
 import os
 
 import xml.etree.ElementTree as ET
 import re
-from typing import Dict, Any, List, Optional
-from pydantic import BaseModel
-
-# --- Data Models ---
-
-class TestSummary(BaseModel):
-    total: int
-    failures: int
-    errors: int
-    skipped: int
-    time: float
-    failed_test_names: List[str]
-
-class CoverageSummary(BaseModel):
-    line_rate: float
-    total_lines: int
-    covered_lines: int
-
-class SecurityConfig(BaseModel):
-    face_threshold: Optional[float]
-    liveness_min_frames: Optional[int]
-
-class LogAnalysis(BaseModel):
-    error_count: int
-    warning_count: int
-    critical_errors: List[str]
-    warnings: List[str]
+from typing import Dict, List, Tuple
+
+try:
+    from lxml import etree  # type: ignore[import-untyped]
+except ImportError:
+    etree = None  # Fall back to the xml.etree DOM parser
+
+# Data models live in models.py so this module can be compiled with mypyc
+# (mypyc cannot compile pydantic model classes). Re-exported for existing imports.
+from src.tools.models import TestSummary, CoverageSummary, SecurityConfig, LogAnalysis
 
 # --- Logic Implementations ---
 
+_PARSE_CACHE_SIZE = 64
+
+def _stat_or_raise(file_path: str, message: str) -> os.stat_result:
+    try:
+        return os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"{message}: {file_path}")
+
 def parse_junit_xml(file_path: str) -> TestSummary:
     """
     Parses a JUnit XML file to extract test execution metrics.
     Raises FileNotFoundError or ValueError on parsing issues.
+    Results are memoized per (path, mtime, size), so rewriting the file invalidates them;
+    the returned model is shared between callers and must not be mutated.
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Test result file not found: {file_path}")
+    st = _stat_or_raise(file_path, "Test result file not found")
+    return _parse_junit_cached(file_path, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_junit_cached(file_path: str, mtime_ns: int, size: int) -> TestSummary:
+    # mtime_ns and size are only part of the cache key
+    if etree is None:
+        return _parse_junit_xml_dom(file_path)
+
+    try:
+        return _parse_junit_xml_stream(file_path)
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Invalid XML format in {file_path}: {e}")
+
+def _is_top_level_suite(suite) -> bool:
+    # Only the root <testsuite> or direct children of a root <testsuites> are counted
+    parent = suite.getparent()
+    return parent is None or (parent.tag == 'testsuites' and parent.getparent() is None)
+
+def _parse_junit_xml_stream(file_path: str) -> TestSummary:
+    """
+    Streams the report with lxml iterparse, discarding each element once it is processed.
+    system-out/system-err bodies are dropped as soon as they are read, so peak memory
+    stays flat even for reports with very large captured output.
+    """
+    total = 0
+    failures = 0
+    errors = 0
+    skipped = 0
+    time = 0.0
+    failed_tests: List[str] = []
+
+    context = etree.iterparse(
+        file_path,
+        events=("end",),
+        tag=("testsuite", "testcase", "system-out", "system-err"),
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True
+    )
+    for _, elem in context:
+        tag = elem.tag
+        if tag == 'testcase':
+            parent = elem.getparent()
+            if parent is not None and parent.tag == 'testsuite' and _is_top_level_suite(parent):
+                if elem.find('failure') is not None or elem.find('error') is not None:
+                    name = elem.get('name', 'unknown')
+                    classname = elem.get('classname', '')
+                    failed_tests.append(f"{classname}::{name}")
+        elif tag == 'testsuite':
+            if _is_top_level_suite(elem):
+                total += int(elem.get('tests', 0))
+                failures += int(elem.get('failures', 0))
+                errors += int(elem.get('errors', 0))
+                skipped += int(elem.get('skipped', 0))
+                time += float(elem.get('time', 0.0))
+        else:
+            # system-out / system-err: nothing needed from the body
+            elem.clear(keep_tail=True)
+            continue
+
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+    return TestSummary(
+        total=total,
+        failures=failures,
+        errors=errors,
+        skipped=skipped,
+        time=time,
+        failed_test_names=failed_tests
+    )
 
+def _parse_junit_xml_dom(file_path: str) -> TestSummary:
+    """
+    xml.etree implementation used when lxml is not installed. Builds the full tree.
+    """
     try:
         tree = ET.parse(file_path)
         root = tree.getroot()
@@ -49,7 +121,7 @@ def parse_junit_xml(file_path: str) -> TestSummary:
         errors = 0
         skipped = 0
         time = 0.0
-        failed_tests = []
+        failed_tests: List[str] = []
 
         def process_suite(suite):
             nonlocal total, failures, errors, skipped, time
@@ -82,63 +154,274 @@ def parse_junit_xml(file_path: str) -> TestSummary:
     except ET.ParseError as e:
         raise ValueError(f"Invalid XML format in {file_path}: {e}")
 
+_READ_CHUNK_SIZE = 64 * 1024
+
+class _RootRead(Exception):
+    """Raised by _RootAttrTarget to abort parsing once the root element is seen."""
+
+class _RootAttrTarget:
+    """
+    lxml parser target that captures the root element's attributes and stops,
+    so only the first chunk of the file is ever parsed.
+    """
+    def __init__(self):
+        self.attrib = None
+
+    def start(self, tag, attrib):
+        self.attrib = dict(attrib)
+        raise _RootRead()
+
+    def close(self):
+        return self.attrib
+
 def parse_cobertura_xml(file_path: str) -> CoverageSummary:
     """
-    Parses a Cobertura XML file to extract coverage line rate.
+    Parses a Cobertura XML file to extract coverage line rate and line totals.
+    Totals come from the root's lines-valid/lines-covered attributes when present, in which
+    case the rest of the file is never parsed; otherwise <line> elements are counted in one
+    streaming pass.
+    Memoized per (path, mtime, size) like parse_junit_xml.
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"Coverage file not found: {file_path}")
+    st = _stat_or_raise(file_path, "Coverage file not found")
+    return _parse_cobertura_cached(file_path, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_cobertura_cached(file_path: str, mtime_ns: int, size: int) -> CoverageSummary:
+    if etree is None:
+        root = _read_cobertura_root_attrs_stdlib(file_path)
+    else:
+        root = _read_cobertura_root_attrs(file_path)
 
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        return CoverageSummary(
-            line_rate=float(root.get('line-rate', 0.0)),
-            # Cobertura often puts valid lines in the root or package elements
-            # For this summary, rate is the primary metric.
-            total_lines=0,
-            covered_lines=0 
-        )
+        has_totals = 'lines-valid' in root and 'lines-covered' in root
+        if has_totals:
+            total_lines = int(root['lines-valid'])
+            covered_lines = int(root['lines-covered'])
+        line_rate = float(root['line-rate']) if 'line-rate' in root else None
+    except ValueError as e:
+        raise ValueError(f"Invalid Cobertura XML format in {file_path}: {e}")
+
+    if not has_totals:
+        total_lines, covered_lines = _count_cobertura_lines(file_path)
+    if line_rate is None:
+        line_rate = covered_lines / total_lines if total_lines else 0.0
+
+    return CoverageSummary(
+        line_rate=line_rate,
+        total_lines=total_lines,
+        covered_lines=covered_lines
+    )
+
+def _read_cobertura_root_attrs(file_path: str) -> Dict[str, str]:
+    target = _RootAttrTarget()
+    parser = etree.XMLParser(target=target, resolve_entities=False, no_network=True)
+    try:
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+    except _RootRead:
+        return target.attrib
+    except etree.XMLSyntaxError as e:
+        raise ValueError(f"Invalid Cobertura XML format in {file_path}: {e}")
+
+    # EOF reached without a complete root start tag
+    try:
+        parser.close()
+    except (etree.XMLSyntaxError, _RootRead) as e:
+        raise ValueError(f"Invalid Cobertura XML format in {file_path}: {str(e) or 'truncated root element'}")
+    raise ValueError(f"Invalid Cobertura XML format in {file_path}: no root element")
+
+def _read_cobertura_root_attrs_stdlib(file_path: str) -> Dict[str, str]:
+    try:
+        for _, root in ET.iterparse(file_path, events=("start",)):
+            return dict(root.attrib)
     except ET.ParseError as e:
         raise ValueError(f"Invalid Cobertura XML format in {file_path}: {e}")
+    raise ValueError(f"Invalid Cobertura XML format in {file_path}: no root element")
+
+def _count_cobertura_lines(file_path: str) -> Tuple[int, int]:
+    """
+    Counts (total, covered) class-level <line> elements in a single streaming pass.
+    Lines repeated under <method> elements are subtracted when the method closes, so
+    nothing is counted twice. Uses xml.etree even when lxml is available: with one
+    element per line, expat's end events are measurably cheaper than lxml's iterparse.
+    """
+    total = 0
+    covered = 0
+    try:
+        for _, elem in ET.iterparse(file_path):
+            tag = elem.tag
+            if tag == 'line':
+                total += 1
+                if int(elem.get('hits', 0)) > 0:
+                    covered += 1
+            elif tag == 'method':
+                for line in elem.iter('line'):
+                    total -= 1
+                    if int(line.get('hits', 0)) > 0:
+                        covered -= 1
+                elem.clear()
+            elif tag == 'class':
+                elem.clear()
+    except (ET.ParseError, ValueError) as e:
+        raise ValueError(f"Invalid Cobertura XML format in {file_path}: {e}")
+    return total, covered
+
+_FACE_THRESHOLD_RE = re.compile(rb'face_detection_threshold.*=\s*([0-9.]+)')
+_LIVENESS_FRAMES_RE = re.compile(rb'liveness_min_valid_frames.*=\s*(\d+)')
 
 def read_security_config(config_path: str) -> SecurityConfig:
     """
     Reads a python config file to extract specific security constants using regex.
     Designed to work without importing the actual module (safer in CI).
+    The file is memory-mapped and searched as bytes, so it is never decoded as a whole.
     """
     if not os.path.exists(config_path):
         return SecurityConfig(face_threshold=None, liveness_min_frames=None)
 
-    with open(config_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    face_match = re.search(r'face_detection_threshold.*=\s*([0-9.]+)', content)
-    liveness_match = re.search(r'liveness_min_valid_frames.*=\s*(\d+)', content)
+    with open(config_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            return SecurityConfig(face_threshold=None, liveness_min_frames=None)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            face_match = _FACE_THRESHOLD_RE.search(content)
+            liveness_match = _LIVENESS_FRAMES_RE.search(content)
+            # Copy the captured groups out before the mapping is closed
+            face_value = face_match.group(1).decode('ascii') if face_match else None
+            liveness_value = liveness_match.group(1).decode('ascii') if liveness_match else None
 
     return SecurityConfig(
-        face_threshold=float(face_match.group(1)) if face_match else None,
-        liveness_min_frames=int(liveness_match.group(1)) if liveness_match else None
+        face_threshold=float(face_value) if face_value else None,
+        liveness_min_frames=int(liveness_value) if liveness_value else None
     )
 
+# Line boundaries recognised by str.splitlines() other than "\n"
+_OTHER_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+def _count_keywords(lowered: str, start: int = 0) -> Tuple[int, int]:
+    """
+    Approximate (error, warning) totals from keyword occurrences in lowered text.
+    Each str.count is a single C-level sweep, far cheaper than visiting lines.
+    """
+    errors = lowered.count("error", start) + lowered.count("exception", start)
+    return errors, lowered.count("warning", start)
+
+def _find_or_end(text: str, keyword: str, start: int) -> int:
+    """
+    Offset of the next keyword at or after start, or len(text) when there is none.
+    """
+    offset = text.find(keyword, start)
+    if offset < 0:
+        return len(text)
+    return offset
+
 def analyze_logs(log_content: str, max_lines: int = 50) -> LogAnalysis:
     """
     Scans a text string for error/exception keywords.
+    Lines mentioning error/exception count as errors, otherwise lines mentioning warning count as warnings.
+    Scanning stops once both lists hold max_lines entries and truncated is set. The counts
+    then stay exact for the scanned part, and the unscanned rest of the log is added as raw
+    keyword occurrence counts (str.count). That is approximate: a line mentioning two
+    keywords counts twice. max_lines=0 returns exact counts only, with no early exit.
+    """
+    lowered = log_content.lower()
+    # The fast path maps offsets in the lowered text back onto the original,
+    # so it needs plain "\n" line endings and a length-preserving lower().
+    if len(lowered) != len(log_content) or any(c in log_content for c in _OTHER_LINE_BREAKS):
+        return _analyze_log_lines(log_content, max_lines)
+
+    n = len(lowered)
+    find = lowered.find
+    error_count = 0
+    warning_count = 0
+    errors: List[str] = []
+    warnings: List[str] = []
+    truncated = False
+
+    # Next offset of each keyword; only lines containing one are ever visited
+    next_error = _find_or_end(lowered, "error", 0)
+    next_exception = _find_or_end(lowered, "exception", 0)
+    next_warning = _find_or_end(lowered, "warning", 0)
+
+    pos = 0
+    while True:
+        hit = min(next_error, next_exception, next_warning)
+        if hit >= n:
+            break
+        if max_lines > 0 and len(errors) >= max_lines and len(warnings) >= max_lines:
+            tail_errors, tail_warnings = _count_keywords(lowered, pos)
+            error_count += tail_errors
+            warning_count += tail_warnings
+            truncated = True
+            break
+        start = lowered.rfind("\n", pos, hit) + 1
+        end = find("\n", hit)
+        if end < 0:
+            end = n
+
+        if next_error < end or next_exception < end:
+            error_count += 1
+            if len(errors) < max_lines:
+                errors.append(log_content[start:min(end, start + 300)]) # Truncate long lines
+        else:
+            warning_count += 1
+            if len(warnings) < max_lines:
+                warnings.append(log_content[start:min(end, start + 300)])
+
+        pos = end
+        if next_error < end:
+            next_error = _find_or_end(lowered, "error", end)
+        if next_exception < end:
+            next_exception = _find_or_end(lowered, "exception", end)
+        if next_warning < end:
+            next_warning = _find_or_end(lowered, "warning", end)
+
+    return LogAnalysis(
+        error_count=error_count,
+        warning_count=warning_count,
+        critical_errors=errors,
+        warnings=warnings,
+        truncated=truncated
+    )
+
+def _analyze_log_lines(log_content: str, max_lines: int) -> LogAnalysis:
+    """
+    Line-by-line scan used for logs with non-"\n" line endings.
     """
     lines = log_content.splitlines()
-    errors = []
-    warnings = []
+    errors: List[str] = []
+    warnings: List[str] = []
+    error_count = 0
+    warning_count = 0
+    truncated = False
 
-    for line in lines:
+    for i, line in enumerate(lines):
         line_lower = line.lower()
-        if "error" in line_lower or "exception" in line_lower:
-            errors.append(line[:300]) # Truncate long lines
-        elif "warning" in line_lower:
-            warnings.append(line[:300])
+        is_error = "error" in line_lower or "exception" in line_lower
+        if not is_error and "warning" not in line_lower:
+            continue
+        if max_lines > 0 and len(errors) >= max_lines and len(warnings) >= max_lines:
+            tail_errors, tail_warnings = _count_keywords("\n".join(lines[i:]).lower())
+            error_count += tail_errors
+            warning_count += tail_warnings
+            truncated = True
+            break
+        if is_error:
+            error_count += 1
+            if len(errors) < max_lines:
+                errors.append(line[:300]) # Truncate long lines
+        else:
+            warning_count += 1
+            if len(warnings) < max_lines:
+                warnings.append(line[:300])
             
     return LogAnalysis(
-        error_count=len(errors),
-        warning_count=len(warnings),
-        critical_errors=errors[:max_lines],
-        warnings=warnings[:max_lines]
+        error_count=error_count,
+        warning_count=warning_count,
+        critical_errors=errors,
+        warnings=warnings,
+        truncated=truncated
     )
@@ -0,0 +1,178 @@
+import os
+
+import pytest
+
+from src.tools import parsers
+from src.tools.parsers import analyze_logs, _analyze_log_lines
+
+
+def baseline_analyze_logs(log_content, max_lines):
+    """The original one-pass line loop, kept here as the reference behaviour."""
+    errors = []
+    warnings = []
+    for line in log_content.splitlines():
+        line_lower = line.lower()
+        if "error" in line_lower or "exception" in line_lower:
+            errors.append(line[:300])
+        elif "warning" in line_lower:
+            warnings.append(line[:300])
+    return len(errors), len(warnings), errors[:max_lines], warnings[:max_lines]
+
+
+LOGS = [
+    "",
+    "all good\nnothing to see",
+    "ERROR: boom\nWarning: careful\nok\nException in thread main",
+    "first error\r\nsecond warning\r\nthird\r\n",
+    "mixed\rcarriage error\rreturns warning\n",
+    "İstanbul error\nİİİ warning\nplain exception",
+    "error " + "x" * 500 + "\nwarning " + "y" * 301,
+    "x" * 299 + "error" + "\n" + "y" * 400 + "warning",
+    "form\x0cfeed error\x0bvertical warning separator exception",
+    "error and warning on one line\nWARNING only\nErRoR",
+]
+
+
+@pytest.mark.parametrize("analyze", [analyze_logs, _analyze_log_lines])
+@pytest.mark.parametrize("log_content", LOGS)
+def test_analyze_logs_matches_baseline(analyze, log_content):
+    result = analyze(log_content, 50)
+    error_count, warning_count, errors, warnings = baseline_analyze_logs(log_content, 50)
+    assert result.critical_errors == errors
+    assert result.warnings == warnings
+    assert result.error_count == error_count
+    assert result.warning_count == warning_count
+    assert not result.truncated
+
+
+@pytest.mark.parametrize("analyze", [analyze_logs, _analyze_log_lines])
+@pytest.mark.parametrize("log_content", LOGS)
+def test_analyze_logs_counts_only(analyze, log_content):
+    result = analyze(log_content, 0)
+    error_count, warning_count, _, _ = baseline_analyze_logs(log_content, 0)
+    assert (result.error_count, result.warning_count) == (error_count, warning_count)
+    assert result.critical_errors == result.warnings == []
+    assert not result.truncated
+
+
+@pytest.mark.parametrize("analyze", [analyze_logs, _analyze_log_lines])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_analyze_logs_truncated_keeps_samples(analyze, newline):
+    lines = []
+    for i in range(40):
+        lines.append(f"line {i} error")
+        lines.append(f"line {i} İ warning " + "z" * 350)
+        lines.append("noise")
+    log_content = newline.join(lines)
+
+    result = analyze(log_content, 5)
+    error_count, warning_count, errors, warnings = baseline_analyze_logs(log_content, 5)
+    assert result.truncated
+    assert result.critical_errors == errors
+    assert result.warnings == warnings
+    # Totals past the early exit are keyword occurrence estimates, never below the line counts
+    assert result.error_count >= error_count
+    assert result.warning_count >= warning_count
+
+
+JUNIT_REPORTS = {
+    "testsuites.xml": """<?xml version="1.0"?>
+<testsuites>
+ <testsuite name="a" tests="3" failures="1" errors="1" skipped="0" time="1.5">
+  <properties><property name="x" value="y"/></properties>
+  <testcase name="t1" classname="A"><system-out><![CDATA[lots of output]]></system-out></testcase>
+  <testcase name="t2" classname="A"><failure message="boom">trace</failure></testcase>
+  <testcase name="t3" classname="A"><error/><system-err>err</system-err></testcase>
+ </testsuite>
+ <testsuite name="b" tests="1" failures="0" errors="0" skipped="1" time="0.25">
+  <testcase name="t4" classname="B"><skipped/></testcase>
+  <testsuite name="nested" tests="9"><testcase name="n" classname="N"><failure/></testcase></testsuite>
+ </testsuite>
+</testsuites>
+""",
+    "testsuite.xml": '<testsuite tests="2" failures="1"><testcase name="z"><failure/></testcase><testcase name="y"/></testsuite>',
+    "empty.xml": "<testsuites/>",
+}
+
+
+@pytest.mark.skipif(parsers.etree is None, reason="lxml not installed")
+@pytest.mark.parametrize("report", sorted(JUNIT_REPORTS))
+def test_junit_stream_matches_dom(tmp_path, report):
+    path = tmp_path / report
+    path.write_text(JUNIT_REPORTS[report], encoding="utf-8")
+    assert parsers._parse_junit_xml_stream(str(path)) == parsers._parse_junit_xml_dom(str(path))
+
+
+COBERTURA_NO_TOTALS = """<?xml version="1.0"?>
+<coverage version="1">
+ <packages><package name="p"><classes>
+  <class name="a" filename="a.py">
+   <methods><method name="f" signature=""><lines><line number="1" hits="1"/><line number="2" hits="0"/></lines></method></methods>
+   <lines><line number="1" hits="1"/><line number="2" hits="0"/><line number="3" hits="4"/></lines>
+  </class>
+  <class name="b" filename="b.py"><lines><line number="1" hits="0"/></lines></class>
+ </classes></package></packages>
+</coverage>
+"""
+
+
+def test_cobertura_counts_class_lines_once(tmp_path):
+    path = tmp_path / "coverage.xml"
+    path.write_text(COBERTURA_NO_TOTALS, encoding="utf-8")
+    summary = parsers.parse_cobertura_xml(str(path))
+    assert (summary.total_lines, summary.covered_lines) == (4, 2)
+    assert summary.line_rate == 0.5
+
+
+@pytest.fixture
+def clear_parse_caches():
+    parsers._parse_junit_cached.cache_clear()
+    parsers._parse_cobertura_cached.cache_clear()
+    yield
+    parsers._parse_junit_cached.cache_clear()
+    parsers._parse_cobertura_cached.cache_clear()
+
+
+def _rewrite(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_junit_cache_follows_file_changes(tmp_path, clear_parse_caches):
+    path = tmp_path / "results.xml"
+    _rewrite(path, '<testsuite tests="1" failures="0"/>', 1_000_000_000)
+    first = parsers.parse_junit_xml(str(path))
+    assert parsers.parse_junit_xml(str(path)) is first
+
+    # Same size, new mtime
+    _rewrite(path, '<testsuite tests="2" failures="0"/>', 2_000_000_000)
+    assert parsers.parse_junit_xml(str(path)).total == 2
+
+    # Same mtime, new size
+    _rewrite(path, '<testsuite tests="30" failures="0"/>', 2_000_000_000)
+    assert parsers.parse_junit_xml(str(path)).total == 30
+
+
+def test_cobertura_cache_follows_file_changes(tmp_path, clear_parse_caches):
+    path = tmp_path / "coverage.xml"
+    _rewrite(path, '<coverage line-rate="0.5" lines-valid="2" lines-covered="1"/>', 1_000_000_000)
+    assert parsers.parse_cobertura_xml(str(path)).line_rate == 0.5
+
+    _rewrite(path, '<coverage line-rate="0.7" lines-valid="2" lines-covered="1"/>', 2_000_000_000)
+    assert parsers.parse_cobertura_xml(str(path)).line_rate == 0.7
+
+
+@pytest.mark.parametrize("parse, bad, good", [
+    (parsers.parse_junit_xml, '<testsuite tests="1" failures="0" >', '<testsuite tests="1" failures="0"/>'),
+    (parsers.parse_cobertura_xml, '<coverage line-rate="x.5"/>', '<coverage line-rate="0.5"/>'),
+])
+def test_parse_errors_are_not_cached(tmp_path, clear_parse_caches, parse, bad, good):
+    path = tmp_path / "report.xml"
+    _rewrite(path, bad, 1_000_000_000)
+    with pytest.raises(ValueError):
+        parse(str(path))
+
+    # Fixed in place with the same size and mtime, so the cache key is unchanged
+    assert len(bad) == len(good)
+    _rewrite(path, good, 1_000_000_000)
+    assert parse(str(path)) is not None
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from src.server import is_path_safe
+
+HOME = os.path.expanduser("~")
+
+
+def test_base_directory_is_allowed():
+    assert is_path_safe(HOME)
+    assert is_path_safe(os.path.join(HOME, "artifacts", "coverage.xml"))
+
+
+def test_sibling_with_shared_prefix_is_rejected():
+    assert not is_path_safe(HOME + "x")
+    assert not is_path_safe(os.path.join(HOME + "x", "coverage.xml"))
+
+
+def test_parent_escape_is_rejected():
+    assert not is_path_safe(os.path.join(HOME, "..", "..", "etc", "passwd"))